@@ -1,6 +1,16 @@
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel
+import logging
+import threading
+from typing import Optional
+
+from PySide6.QtWidgets import QCheckBox, QDialog, QDialogButtonBox, QFormLayout, QVBoxLayout, QLineEdit, QLabel, QProgressBar, QMessageBox
 #from PySide6.QtGui import QLineEdit
-from PySide6.QtCore import QTimer
+from PySide6.QtCore import QObject, QSettings, QSize, QThreadPool, QTimer, Qt, Signal
+
+# Optional; without it the password is never stored and "Remember me" is off
+try:
+    import keyring
+except ImportError:
+    keyring = None
 
 from doclink_py.sql.doclink_sql import DocLinkSQLCredentials, DocLinkSQL
 
@@ -11,44 +21,156 @@ _DEF_SVR_NAME = "192.168.1.24"
 _DEF_DB_NAME = "doclink2"
 _DEF_USR_NAME = "sa"
 
+_SETTINGS_ORG = "DLExpress"
+_SETTINGS_APP = "ConnectWindow"
+_KEYRING_SERVICE = "DLExpress"
+
+# How long to wait on a connect before asking the user whether to keep waiting.
+# Kept under the login timeout so the prompt can appear before the driver gives up
+_KEEP_WAITING_MS = 5000
+
+# Authenticated connections keyed by (server, database, username) so reopening
+# the dialog doesn't repeat the handshake
+_CONN_CACHE: dict[tuple[str, str, str], DocLinkSQL] = {}
+
+def connection_key(credentials: DocLinkSQLCredentials) -> tuple[str, str, str]:
+    return (credentials.server_name, credentials.database_name, credentials.username)
+
+def get_cached_connection(key: tuple[str, str, str], password: str) -> Optional[DocLinkSQL]:
+    doclink = _CONN_CACHE.get(key)
+
+    # Don't hand out a session to someone who doesn't know its password
+    if doclink is None or doclink.credentials.password != password:
+        return None
+
+    if not doclink.is_alive():
+        invalidate_cached_connection(key)
+        return None
+
+    return doclink
+
+def load_remembered_credentials() -> Optional[DocLinkSQLCredentials]:
+    """Returns the saved credentials if the user asked to be remembered and
+    a password is available from the keyring"""
+
+    settings = QSettings(_SETTINGS_ORG, _SETTINGS_APP)
+    if keyring is None or not settings.value("remember", False, type=bool):
+        return None
+
+    username = settings.value("username", _DEF_USR_NAME)
+    try:
+        password = keyring.get_password(_KEYRING_SERVICE, username)
+    except keyring.errors.KeyringError as e:
+        logging.warning(f"Could not read password from keyring: {e}")
+        return None
+
+    if password is None:
+        return None
+
+    return DocLinkSQLCredentials(
+            settings.value("server", _DEF_SVR_NAME),
+            settings.value("database", _DEF_DB_NAME),
+            username,
+            password
+        )
+
+def invalidate_cached_connection(key: tuple[str, str, str]) -> None:
+    """Evicts and closes a cached connection, e.g. once it has dropped"""
+
+    doclink = _CONN_CACHE.pop(key, None)
+    if doclink is not None:
+        doclink.disconnect()
+
+class ConnectWorker(QObject):
+    """Runs DocLinkSQL.connect on a pool thread and reports back via signal"""
+
+    # Emits the connected handle (or None) and an error message
+    finished = Signal(object, str)
+
+    def __init__(self, doclink: DocLinkSQL, credentials: DocLinkSQLCredentials):
+        super().__init__()
+        self.doclink = doclink
+        self.credentials = credentials
+
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            self.doclink.connect(self.credentials)
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.finished.emit(None, str(e))
+            return
+
+        # The driver call itself can't be interrupted, so a cancelled attempt
+        # that still succeeded is closed again here
+        if self.cancelled.is_set():
+            self.doclink.disconnect()
+            return
+
+        self.finished.emit(self.doclink, "")
+
 class ConnectWindow(QDialog):
     def __init__(self):
         super().__init__()
 
         self.connection_handle = None
+        self.worker: Optional[ConnectWorker] = None
+        self.wait_prompt: Optional[QMessageBox] = None
+
+        self.wait_timer = QTimer(self)
+        self.wait_timer.setSingleShot(True)
+        self.wait_timer.timeout.connect(self.prompt_keep_waiting)
 
         self.setWindowTitle("Login")
-        self.setGeometry(150, 150, _DEF_WDW_SZ_X, _DEF_WDW_SZ_Y)
+        self.move(150, 150)
 
         layout = QVBoxLayout()
+        layout.setContentsMargins(6, 6, 6, 6)
+        layout.setSpacing(4)
 
-        self.serverName_label = QLabel("Server name:")
-        self.serverName_input = QLineEdit()
-        self.serverName_input.setText(_DEF_SVR_NAME)
-
-        self.databaseName_label = QLabel("Database name:")
-        self.databaseName_input = QLineEdit()
-        self.databaseName_input.setText(_DEF_DB_NAME)
-
-        self.username_label = QLabel("Username:")
-        self.username_input = QLineEdit()
-        self.username_input.setText(_DEF_USR_NAME)
-
-        self.password_label = QLabel("Password:")
+        # Initial text goes through the constructors and the rows through one
+        # form layout to keep the number of binding calls down
+        # Last successful values take priority over the defaults
+        settings = QSettings(_SETTINGS_ORG, _SETTINGS_APP)
+        self.serverName_input = QLineEdit(settings.value("server", _DEF_SVR_NAME))
+        self.databaseName_input = QLineEdit(settings.value("database", _DEF_DB_NAME))
+        self.username_input = QLineEdit(settings.value("username", _DEF_USR_NAME))
         self.password_input = QLineEdit()
         self.password_input.setEchoMode(QLineEdit.Password)  # Hide the password input
 
-        layout.addWidget(self.serverName_label)
-        layout.addWidget(self.serverName_input)
+        form = QFormLayout()
+        for labelText, lineEdit in (
+                ("Server name:", self.serverName_input),
+                ("Database name:", self.databaseName_input),
+                ("Username:", self.username_input),
+                ("Password:", self.password_input),
+            ):
+            form.addRow(labelText, lineEdit)
+        layout.addLayout(form)
 
-        layout.addWidget(self.databaseName_label)
-        layout.addWidget(self.databaseName_input)
+        self.remember_checkbox = QCheckBox("Remember me")
+        if keyring is None:
+            self.remember_checkbox.setEnabled(False)
+            self.remember_checkbox.setToolTip("Install keyring to store the password")
+        else:
+            self.remember_checkbox.setChecked(settings.value("remember", False, type=bool))
+        layout.addWidget(self.remember_checkbox)
 
-        layout.addWidget(self.username_label)
-        layout.addWidget(self.username_input)
+        self.error_label = QLabel()
+        self.error_label.setStyleSheet("color: red")
+        self.error_label.setWordWrap(True)
+        self.error_label.hide()
+        layout.addWidget(self.error_label)
 
-        layout.addWidget(self.password_label)
-        layout.addWidget(self.password_input)
+        # Busy indicator while the connect runs in the background
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
 
         layout.addStretch()
 
@@ -59,36 +181,194 @@ class ConnectWindow(QDialog):
 #        password = QLineEdit()
 #        password.setEchoMode(QLineEdit.PasswordEchoOnEdit)
         
-        connectButton = QPushButton("Connect")
-        connectButton.clicked.connect(self.connect_action)
-
-        cancelButton = QPushButton("Cancel")
-        cancelButton.clicked.connect(self.reject)
+        buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.connectButton = buttonBox.button(QDialogButtonBox.Ok)
+        self.connectButton.setText("Connect")
+        buttonBox.accepted.connect(self.connect_action)
+        buttonBox.rejected.connect(self.cancel_action)
 
-        buttonBox = QHBoxLayout()
-        buttonBox.addWidget(connectButton)
-        buttonBox.addWidget(cancelButton)
-
-#        layout.addWidget(username)
-#        layout.addWidget(password)
-        layout.addLayout(buttonBox)
+        layout.addWidget(buttonBox)
         
         self.setLayout(layout)
 
+        # Sized once from the finished layout rather than before it exists
+        self.resize(self.sizeHint().expandedTo(QSize(_DEF_WDW_SZ_X, _DEF_WDW_SZ_Y)))
+
+    def auto_connect(self) -> bool:
+        """Starts connecting with remembered credentials without showing the
+        dialog. Returns False if there is nothing to connect with; on failure
+        the dialog is opened with the error"""
+
+        credentials = load_remembered_credentials()
+        if credentials is None:
+            return False
+
+        self.serverName_input.setText(credentials.server_name)
+        self.databaseName_input.setText(credentials.database_name)
+        self.username_input.setText(credentials.username)
+        self.password_input.setText(credentials.password)
+
+        self.start_connect(credentials)
+        return True
+
     def connect_action(self):
-        doclink = DocLinkSQL()
+        if self.worker is not None:
+            return
+
         credentials = DocLinkSQLCredentials(
                 self.serverName_input.text(),
                 self.databaseName_input.text(),
                 self.username_input.text(),
                 self.password_input.text()
             )
-        doclink.connect(credentials)
+
+        self.start_connect(credentials)
+
+    def start_connect(self, credentials: DocLinkSQLCredentials):
+        cached = get_cached_connection(connection_key(credentials), credentials.password)
+        if cached is not None:
+            self.save_settings(cached.credentials)
+            self.connection_handle = cached
+            self.accept()
+            return
+
+        doclink = DocLinkSQL()
+
+        # Connecting can block for a long time on a slow or unreachable
+        # server so it is done off the GUI thread
+        self.worker = ConnectWorker(doclink, credentials)
+        self.worker.finished.connect(self.connect_finished, Qt.QueuedConnection)
+
+        self.set_connecting(True)
+        self.wait_timer.start(_KEEP_WAITING_MS)
+        QThreadPool.globalInstance().start(self.worker.run)
+
+    def cancel_action(self):
+        # Cancel while connecting returns to the form; otherwise closes
+        if self.worker is not None:
+            self.cancel_connect()
+        else:
+            self.reject()
+
+    def cancel_connect(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+        self.set_connecting(False)
+
+    def prompt_keep_waiting(self):
+        worker = self.worker
+        if worker is None:
+            return
+
+        if not self.isVisible():
+            # A remembered-credentials connect is slow; show the dialog so it
+            # can be cancelled from there
+            self.open()
+            self.wait_timer.start(_KEEP_WAITING_MS)
+            return
+
+        prompt = QMessageBox(
+                QMessageBox.Question,
+                "Still trying...",
+                "The server has not responded yet. Keep waiting?",
+                parent=self
+            )
+        abortButton = prompt.addButton("Abort", QMessageBox.RejectRole)
+        prompt.addButton("Keep Waiting", QMessageBox.AcceptRole)
+        prompt.setAttribute(Qt.WA_DeleteOnClose)
+        prompt.finished.connect(lambda: self.keep_waiting_answered(prompt, abortButton, worker))
+
+        # Non-blocking so the connect result is still delivered while it is up
+        self.wait_prompt = prompt
+        prompt.open()
+
+    def keep_waiting_answered(self, prompt: QMessageBox, abortButton, worker: ConnectWorker):
+        if self.wait_prompt is prompt:
+            self.wait_prompt = None
+
+        if self.worker is not worker:
+            # Finished or cancelled while the prompt was open
+            return
+
+        if prompt.clickedButton() is abortButton:
+            self.reject()
+        else:
+            self.wait_timer.start(_KEEP_WAITING_MS)
+
+    def close_wait_prompt(self):
+        prompt = self.wait_prompt
+        self.wait_prompt = None
+        if prompt is not None:
+            prompt.close()
+
+    def connect_finished(self, doclink, error: str):
+        if self.sender() is not self.worker:
+            # Result from an attempt that was abandoned
+            return
+
+        self.worker = None
+        self.set_connecting(False)
+
+        if doclink is None:
+            self.show_error("Failed to connect: " + error)
+            if not self.isVisible():
+                self.open()
+            return
+
+        self.save_settings(doclink.credentials)
+        _CONN_CACHE[connection_key(doclink.credentials)] = doclink
         self.connection_handle = doclink
         self.accept()
 
-    def exec_connect_window(self):
-        if self.exec() == QDialog.Accepted:
-            return self.connection_handle
+    def show_error(self, message: str):
+        self.error_label.setText(message)
+        self.error_label.show()
+
+    def save_settings(self, credentials: DocLinkSQLCredentials):
+        remember = self.remember_checkbox.isChecked()
+
+        settings = QSettings(_SETTINGS_ORG, _SETTINGS_APP)
+        was_remembered = settings.value("remember", False, type=bool)
+        old_username = settings.value("username", _DEF_USR_NAME)
+        settings.setValue("server", credentials.server_name)
+        settings.setValue("database", credentials.database_name)
+        settings.setValue("username", credentials.username)
+        settings.setValue("remember", remember)
+
+        # The keyring can be slow, so it is only touched when something was or
+        # will be stored there
+        if keyring is None or not (remember or was_remembered):
+            return
+
+        # The password only ever goes to the keyring, never to QSettings
+        try:
+            # Drop the stored password unless it is about to be overwritten
+            if was_remembered and (not remember or old_username != credentials.username):
+                try:
+                    keyring.delete_password(_KEYRING_SERVICE, old_username)
+                except keyring.errors.PasswordDeleteError:
+                    pass  # Already gone
+            if remember:
+                keyring.set_password(_KEYRING_SERVICE, credentials.username, credentials.password)
+        except keyring.errors.KeyringError as e:
+            logging.warning(f"Could not update keyring: {e}")
+
+    def set_connecting(self, connecting: bool):
+        self.connectButton.setEnabled(not connecting)
+        self.progress_bar.setVisible(connecting)
+
+        if not connecting:
+            self.wait_timer.stop()
+            self.close_wait_prompt()
+
+        if connecting:
+            self.error_label.hide()
+            self.setCursor(Qt.WaitCursor)
         else:
-            return None
+            self.unsetCursor()
+
+    def reject(self):
+        # Drop any in-flight attempt so a late success can't accept the dialog
+        self.cancel_connect()
+        super().reject()
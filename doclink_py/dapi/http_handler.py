@@ -60,17 +60,22 @@ class HTTPHandler:
             params=parameters,
         )
         response.raise_for_status()
-        logging.debug(f"Response: {json.dumps(response.json(), indent=4)}")
 
-        return response.json()
+        result = response.json()
+        # Pretty-printing the whole body is only worth it if it is logged
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"Response: {json.dumps(result, indent=4)}")
+
+        return result
 
     def post_request(
         self, url: str, data: dict, requires_auth: bool | None = True
     ) -> dict | list:
         """Send a POST request to the specified URL."""
-        logging.debug(
-            f"Sending POST request to {url} with data {json.dumps(data, indent=4)}"
-        )
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                f"Sending POST request to {url} with data {json.dumps(data, indent=4)}"
+            )
         self._check_authenticated(requires_auth)
 
         response: requests.Response = requests.post(
@@ -82,9 +87,12 @@ class HTTPHandler:
 
         if not response.content:
             return {}
-        logging.debug(f"Response: {json.dumps(response.json(), indent=4)}")
 
-        return response.json()
+        result = response.json()
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"Response: {json.dumps(result, indent=4)}")
+
+        return result
 
     def _check_authenticated(self, requires_auth: bool) -> None:
         """Private method to check if the user is authenticated."""
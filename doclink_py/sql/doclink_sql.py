@@ -23,6 +23,7 @@ class DocLinkSQLCredentials:
     database_name: str
     username: str
     password: str
+    timeout: int = 10  # Login timeout in seconds; 0 waits on the driver
 
 
 class DocLinkSQL:
@@ -46,12 +47,28 @@ class DocLinkSQL:
             self.credentials.database_name,
             self.credentials.username,
             self.credentials.password,
+            self.credentials.timeout,
         )
 
     def disconnect(self) -> None:
         if self.sql_handler:
             self.sql_handler.disconnect()
 
+    def is_alive(self, timeout: int = 2) -> bool:
+        """Returns True if the server answers on this connection within
+        timeout seconds. Blocks the caller for at most that long"""
+
+        if self.sql_handler is None or self.sql_handler.connection is None:
+            return False
+
+        try:
+            self.sql_handler.ping(timeout)
+        except Exception as e:
+            logging.warning(f"SQL connection is no longer usable: {e}")
+            return False
+
+        return True
+
     def check_if_sproc_exists(self, sproc_name: str) -> int:
         """Checks if a sproc exists in the database. Returns number of times it exists"""
 
@@ -28,7 +28,7 @@ class SQLHandler:
         self.connection: pyodbc.Connection = None
         self.cursor: pyodbc.Cursor = None
 
-    def connect(self, server_name, database_name, username, password) -> None:
+    def connect(self, server_name, database_name, username, password, timeout: int = 0) -> None:
         # Connect to SQL Server
         logging.info("Connecting to SQL Server...")
         self.connection = pyodbc.connect(
@@ -36,7 +36,8 @@ class SQLHandler:
             "SERVER=" + server_name + ";" +
             "DATABASE=" + database_name + ";" +
             "UID=" + username + ";" +
-            "PWD=" + password + ";"
+            "PWD=" + password + ";",
+            timeout=timeout,
         )
         logging.debug("Connected to SQL Server.")
 
@@ -47,8 +48,22 @@ class SQLHandler:
         logging.info("Disconnecting from SQL Server...")
         if self.connection:
             self.connection.close()
+        self.connection = None
+        self.cursor = None
         logging.debug("Disconnected from SQL Server.")
 
+    @requires_connection
+    def ping(self, timeout: int) -> None:
+        """Round trips a trivial query, giving up after timeout seconds. Not
+        recorded as a transaction"""
+
+        previous = self.connection.timeout
+        self.connection.timeout = timeout
+        try:
+            self.cursor.execute("SELECT 1").fetchone()
+        finally:
+            self.connection.timeout = previous
+
     @requires_connection
     def get_identity(self) -> int:
         self.cursor.execute("SELECT SCOPE_IDENTITY()")
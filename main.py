@@ -1,14 +1,21 @@
 import os
-# The below is designed to fix/silence the debug output.. so far not working
+# Must be set before any Qt import. Rules are newline separated; the pointer
+# dispatch category otherwise logs on every mouse move over the canvas
 os.environ["QT_QPA_EGLFS_NO_TOUCH"] = "1"
-os.environ["QT_LOGGING_RULES"] = "qt.pointer.dispatch.debug=false"
+os.environ["QT_LOGGING_RULES"] = "qt.pointer.dispatch*=false\nqt.qpa.*.debug=false"
 
-from typing import Optional   
+import argparse
+import logging
+import sys
+from typing import Optional, TYPE_CHECKING
 
-from PySide6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, QVBoxLayout
+from PySide6.QtCore import QLoggingCategory, QSize, Qt, qInstallMessageHandler
+from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QVBoxLayout, QWidget, QPushButton, QVBoxLayout
 
-from workflow_designer.wfd_window import WorkflowDesignerWindow
-from connect_window import ConnectWindow
+# The designer and login windows pull in the graphics scene and SQL driver
+# stacks; they are imported when first needed so the main window shows sooner
+if TYPE_CHECKING:
+    from workflow_designer.wfd_window import WorkflowDesignerWindow
 
 _DEF_WIN_X = 250
 _DEF_WIN_Y = 400
@@ -18,12 +25,15 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
 
-        self.workflow_window: Optional[WorkflowDesignerWindow] = None
+        self.workflow_window: Optional["WorkflowDesignerWindow"] = None
+        self.connection = None
 
         self.setWindowTitle("Main Window")
-        self.setGeometry(100, 100, _DEF_WIN_X, _DEF_WIN_Y)
+        self.move(100, 100)
 
         layout = QVBoxLayout()
+        layout.setContentsMargins(6, 6, 6, 6)
+        layout.setSpacing(4)
 
         workflow_button = QPushButton("Workflow Designer")
         workflow_button.clicked.connect(self.open_workflow_designer)
@@ -34,27 +44,97 @@ class MainWindow(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
+        # Sized once from the finished layout rather than before it exists
+        self.resize(self.sizeHint().expandedTo(QSize(_DEF_WIN_X, _DEF_WIN_Y)))
+
     def open_workflow_designer(self) -> None:
         # Called when the WFD button is pressed; Opens WFD window
         #scene = createObjectList('test_data2.xml')
         #print(scene)
 
+        # Only one designer at a time; bring the open one forward
+        if self.workflow_window is not None:
+            self.workflow_window.raise_()
+            self.workflow_window.activateWindow()
+            return
+
+        # Reuse the live session instead of asking to log in again
+        if self.connection is not None:
+            if self.connection.is_alive():
+                self.show_workflow_designer()
+                return
+            self.drop_connection()
+
+        self.open_connect_window()
+
+    def open_connect_window(self, error: Optional[str] = None) -> None:
+        from connect_window import ConnectWindow
+
         self.connect_window = ConnectWindow()
-        connection = self.connect_window.exec_connect_window()
+        self.connect_window.accepted.connect(self.on_connected)
+        self.connect_window.rejected.connect(lambda: logging.info("Login cancelled"))
+
+        if error is not None:
+            # Shown instead of auto connecting so a failure can't loop
+            self.connect_window.show_error(error)
+            self.connect_window.open()
+        # Returning users with saved credentials only see the dialog on failure
+        elif not self.connect_window.auto_connect():
+            self.connect_window.open()
+
+    def on_connected(self) -> None:
+        self.connection = self.connect_window.connection_handle
+        self.show_workflow_designer()
+
+    def show_workflow_designer(self) -> None:
+        from workflow_designer.wfd_window import WorkflowDesignerWindow
+
+        try:
+            self.workflow_window = WorkflowDesignerWindow(self.connection)
+        except Exception as e:
+            logging.error(f"Could not load workflows: {e}")
 
-        if connection:
-            self.workflow_window = WorkflowDesignerWindow(connection)
-            self.workflow_window.exec()
-        else:
-            print("Failed to connect to SQL")
+            # Only a dropped session is forgotten; logging in again won't fix bad data
+            if self.connection.is_alive():
+                QMessageBox.warning(self, "Workflow Designer", f"Could not load workflows:\n{e}")
+            else:
+                self.drop_connection()
+                self.open_connect_window(f"Could not load workflows: {e}")
+            return
 
-        quit()
+        # Deleted on close rather than hidden, so reopening starts fresh
+        self.workflow_window.setAttribute(Qt.WA_DeleteOnClose)
+        self.workflow_window.finished.connect(self.on_designer_closed)
+        self.workflow_window.show()
+
+    def on_designer_closed(self) -> None:
+        self.workflow_window = None
+
+    def drop_connection(self) -> None:
+        from connect_window import connection_key, invalidate_cached_connection
+
+        invalidate_cached_connection(connection_key(self.connection.credentials))
+        self.connection = None
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="DLExpress")
+    parser.add_argument("--quiet", action="store_true", help="Drop all Qt log output")
+
+    # Anything unrecognised is left for Qt
+    return parser.parse_known_args()
 
 
 if __name__ == "__main__":
     # Going to do some xml testing here
 
-    app = QApplication([])
+    args, qt_args = parse_arguments()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    QLoggingCategory.setFilterRules(os.environ["QT_LOGGING_RULES"])
+    if args.quiet:
+        qInstallMessageHandler(lambda *_: None)
+
     main_window = MainWindow()
     main_window.show()
     app.exec()
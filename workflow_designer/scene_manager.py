@@ -1,14 +1,19 @@
-import math
-from typing import Any 
-
-from workflow_designer.wfd_objects import Node, Link, Rect, NODEPROPS, NODEATTRIBS, LINKPROPS, LINKATTRIBS, WFDClickableRect, WFDClickableLine, WFDClickableEllipse, WFDLineSegments
+import logging
+import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain
+from operator import attrgetter
+from typing import Any, Optional
+
+from workflow_designer.wfd_objects import Rect, NODEPROPS, NODEATTRIBS, LINKPROPS, LINKATTRIBS
 from workflow_designer.wfd_scene import WFDScene, WFScene
-from workflow_designer.wfd_utilities import addArrowToLineItem
 from workflow_designer.wfd_xml import createObjectListFromXMLString
 
 from doclink_py.doclink_types.workflows import Workflow, WorkflowActivity, WorkflowPlacement
 from doclink_py.doclink_types.doclink_type_utilities import *   
 
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QGraphicsRectItem, QGraphicsScene, QGraphicsTextItem 
 
 class WorkflowSceneManager:
@@ -20,11 +25,22 @@ class WorkflowSceneManager:
         self.statuses: list[WorkflowActivity]
         self.statuses = doclink.get_workflow_activities()
 
+        # Indexes over the lists above so lookups don't scan them
+        self._workflowByID: dict[int, Workflow] = {wf.WorkflowID: wf for wf in self.workflows}
+        self._statusesByWorkflowID: dict[int, list[WorkflowActivity]] = {}
+        for st in self.statuses:
+            self._statusesByWorkflowID.setdefault(st.WorkflowID, []).append(st)
+        # Sorted once here so every reader gets sequence order for free
+        for statusList in self._statusesByWorkflowID.values():
+            statusList.sort(key=attrgetter("Seq"))
+
         self.workflowStatuses: dict[str, list[str]] = {}
         
+        # Keyed by the canonical (uppercased, interned) key, the same form
+        # wfd_xml gives layout node keys, so those index it directly
         for wfs in self.workflows:
-            self.workflowStatuses[str(wfs.WorkflowKey)] = [
-                    st.Title for st in self.getStatusSequence(str(wfs.WorkflowKey))
+            self.workflowStatuses[sys.intern(str(wfs.WorkflowKey).upper())] = [
+                    st.Title for st in self._statusesByWorkflowID.get(wfs.WorkflowID, ())
                 ]
 
         self.placements: list[WorkflowPlacement] = []
@@ -34,70 +50,124 @@ class WorkflowSceneManager:
         self.graphicScenes: dict[str, Any] = {}
 
         self.newScenes: list[WFScene] = []
+        self.wfScenes: dict[str, WFScene] = {}
+        self._placementByKey: dict[str, tuple[Workflow, WorkflowPlacement]] = {}
+
+        # Layout XML is parsed in the background while the user picks a
+        # workflow. Parsing holds the GIL so one worker is enough
+        self._parsePool = ThreadPoolExecutor(max_workers=1)
+        self._parsedLayouts: dict[str, Future] = {}
+
+        # Workflow keys waiting to be built while the UI is idle
+        self._prebuildQueue: deque[str] = deque()
+
+        # Error message per workflow key whose scene failed to build. These
+        # aren't retried by later clicks or the prebuild
+        self._failedScenes: dict[str, str] = {}
 
+        # Only the placements are indexed here; each WFScene and its graphics
+        # scene are built the first time that workflow is shown
         self.createScenes()
-        self.buildGraphicsScenes()
-
-    def getStatusSequence(self, workflowKey: str) -> list:
-        """Gets all statuses from a workflow sorted by suequence numbers"""
-
-        workflow = get_object_from_list(self.workflows, "WorkflowKey", workflowKey.upper())
-        if not workflow:
-            print("No workflow found with workflow " + workflowKey)
-            quit()
-
-        workflowID = workflow.WorkflowID
-        statusList = get_all_objects_from_list(self.statuses, "WorkflowID", workflowID)
-
-        statusList = sorted(statusList, key=lambda x: x.Seq)
-
-        return statusList
-
-    def buildGraphicsScenes(self):
-        for scene in self.newScenes:
-            new_scene = QGraphicsScene()
-
-            for ent in scene.workflows + scene.statuses:
-                new_scene.addItem(ent.shape.graphicsItem)
-                
-                # This should NOT be needed. My assumption is this is a bug in
-                # Qt. Without this, the text will not be displayed (tested on
-                # MacOS). It will cause a warning as its already been added
-                for textItem in ent.textItems:
-                    new_scene.addItem(textItem)
-                
-            self.graphicScenes[str(scene.sceneWorkflow.WorkflowKey)] = new_scene
-        return
-
-        for key, scene in self.scenes.items():
-            new_scene = QGraphicsScene()
-
-            for wfKey, workflow in scene.workflows.items():
-                rect = WFDClickableRect(workflow.nodeRect.left, workflow.nodeRect.top, workflow.nodeRect.width, workflow.nodeRect.height)
-                new_scene.addItem(rect)
-
-            for stKey, status in scene.statuses.items():
-                ellipse = WFDClickableEllipse(status.nodeRect.cx-status.nodeRect.rx, status.nodeRect.cy-status.nodeRect.ry, status.nodeRect.rx*2, status.nodeRect.ry*2)
-                new_scene.addItem(ellipse)
-
-            for lineSegment in scene.points:
-                last_item = None
-                for line in lineSegment.lines:
-                    last_item = WFDClickableLine(
-                            line.start[0],
-                            line.start[1],
-                            line.end[0],
-                            line.end[1]
-                        )
-                    new_scene.addItem(last_item)
-                if last_item is None:
-                    print("ERROR: no points in scene")
-                    quit()
-                addArrowToLineItem(last_item)
-
-
-            self.graphicScenes[key] = new_scene
-                
+
+    def sceneKeys(self) -> list[str]:
+        """Workflow keys that have a placement, in placement order"""
+        return list(self._placementByKey)
+
+    def getScene(self, workflowKey: str) -> Optional[WFScene]:
+        scene = self.wfScenes.get(workflowKey)
+        if scene is not None:
+            return scene
+
+        entry = self._placementByKey.get(workflowKey)
+        if entry is None:
+            return None
+
+        wf, placement = entry
+        parsedLayout = None
+        future = self._parsedLayouts.pop(workflowKey, None)
+        # A parse still queued behind others is dropped and done here instead
+        if future is not None and not future.cancel():
+            parsedLayout = future.result()
+
+        scene = WFScene(placement, wf, self.workflowStatuses, parsedLayout)
+        self.wfScenes[workflowKey] = scene
+        self.newScenes.append(scene)
+        return scene
+
+    def getGraphicsScene(self, workflowKey: str) -> Optional[QGraphicsScene]:
+        graphicsScene = self.graphicScenes.get(workflowKey)
+        if graphicsScene is not None or workflowKey in self._failedScenes:
+            return graphicsScene
+
+        # One guard per scene so a bad layout is reported and skipped rather
+        # than taking the designer down
+        try:
+            scene = self.getScene(workflowKey)
+            if scene is None:
+                return None
+
+            graphicsScene = self.buildGraphicsScene(scene)
+        except Exception as e:
+            logging.exception("Failed to build scene for workflow %s", workflowKey)
+            self._failedScenes[workflowKey] = str(e)
+
+            # Its items may already be half added to the discarded scene
+            scene = self.wfScenes.pop(workflowKey, None)
+            if scene is not None:
+                self.newScenes.remove(scene)
+            return None
+
+        self.graphicScenes[workflowKey] = graphicsScene
+        return graphicsScene
+
+    def sceneError(self, workflowKey: str) -> Optional[str]:
+        """Why the workflow's scene couldn't be built, or None"""
+        return self._failedScenes.get(workflowKey)
+
+    def prebuildScenes(self):
+        """Builds the graphics scenes not shown yet, one per event loop pass,
+        so switching workflows later doesn't have to wait"""
+
+        self._prebuildQueue = deque(
+                key for key in self._placementByKey
+                if key not in self.graphicScenes and key not in self._failedScenes
+            )
+        if self._prebuildQueue:
+            QTimer.singleShot(0, self._prebuildNext)
+
+    def _prebuildNext(self):
+        while self._prebuildQueue:
+            workflowKey = self._prebuildQueue.popleft()
+            if workflowKey not in self.graphicScenes and workflowKey not in self._failedScenes:
+                self.getGraphicsScene(workflowKey)
+                break
+
+        if self._prebuildQueue:
+            QTimer.singleShot(0, self._prebuildNext)
+
+    def shutdown(self):
+        """Drops any background parses and prebuilds that haven't started"""
+        self._prebuildQueue.clear()
+        self._parsePool.shutdown(wait=False, cancel_futures=True)
+
+    def buildGraphicsScene(self, scene: WFScene) -> QGraphicsScene:
+        new_scene = QGraphicsScene()
+        # Items go in unindexed and the BSP tree is built once at the end
+        # rather than updated per insert. Hit testing needs it back after
+        new_scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+
+        for ent in chain(scene.workflows, scene.statuses):
+            new_scene.addItem(ent.shape.graphicsItem)
+            
+            # This should NOT be needed. My assumption is this is a bug in
+            # Qt. Without this, the text will not be displayed (tested on
+            # MacOS). It will cause a warning as its already been added
+            for textItem in ent.textItems:
+                new_scene.addItem(textItem)
+
+        new_scene.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+
+        return new_scene
 
     def createScenes(self) -> dict:
         """Converts placement data into objects and in a dict with WF Title as key"""
@@ -107,150 +177,18 @@ class WorkflowSceneManager:
 # 
             # scene = self.buildScene(nodes, links)
             
-            wf = get_object_from_list(self.workflows, "WorkflowID", placement.WorkflowID)
+            wf = self._workflowByID.get(placement.WorkflowID)
             if wf is None:
-                input("Error no such workflow from placement")
-                quit()
+                # One orphaned placement shouldn't stop the other workflows loading
+                logging.warning("No workflow %s for placement %s; skipping it", placement.WorkflowID, placement.WorkflowPlacementId)
+                continue
             
-            self.newScenes.append(WFScene(placement, wf, self.workflowStatuses))
+            self._placementByKey[str(wf.WorkflowKey)] = (wf, placement)
+
+        for workflowKey, (wf, placement) in self._placementByKey.items():
+            self._parsedLayouts[workflowKey] = self._parsePool.submit(
+                    createObjectListFromXMLString, placement.LayoutData
+                )
             # self.scenes[wf.Title] = scene
             
         return self.scenes
-
-
-    def buildScene(self, nodeList: list[Node], linkList: list[Link]) -> WFDScene:
-        """Constructs the scene dicts from node and link objects"""
-
-        statuses: dict = {}
-        workflows: dict = {}
-        workflowStatuses: dict = {} # This is so ineffecient it should be illegal
-        links: dict = {}
-        linkPoints: list[tuple] = []
-        points: list[WFDLineSegments] = []
-
-        for node in nodeList:
-            if node.nodeAttribs["LayoutNode"]["Type"] == 'Status':
-                if node.nodeAttribs["LayoutNode"]["Key"] in statuses:
-                    input("Error: node key already in statuses dict")
-
-                statuses[node.nodeAttribs["LayoutNode"]["Key"]] = node
-
-            elif node.nodeAttribs["LayoutNode"]["Type"] == 'Workflow':
-                if node.nodeAttribs["LayoutNode"]["Key"] in workflows:
-                    input("Error: node key already in workflows dict")
-
-                workflows[node.nodeAttribs["LayoutNode"]["Key"]] = node
-                # Again - shamefully innefficent. This info should be fiugred
-                # once and stored somewhere differently
-                if node.nodeAttribs["LayoutNode"]["Key"] not in workflowStatuses:
-                    statusList = self.getStatusSequence(node.nodeAttribs["LayoutNode"]["Key"])
-                    workflowStatuses[node.nodeAttribs["LayoutNode"]["Key"]] = statusList
-
-            else:
-                input("Warning: unknown node type:" + node.nodeAtrribs["LayoutNode"]["Type"])
-
-        for link in linkList:
-            orgNode = statuses.get(
-                    link.linkAttribs["LayoutLink"]["OrgKey"],
-                    workflows.get(link.linkAttribs["LayoutLink"]["OrgKey"], None)
-                    )
-
-            if orgNode == None:
-                act = get_object_from_list(self.statuses, "WorkflowActivityKey", str(link.linkAttribs["LayoutLink"]["OrgKey"]).upper())
-                if act is not None:
-                    orgNode = workflows.get(str(get_object_from_list(self.workflows, "WorkflowID", act.WorkflowID).WorkflowKey).lower())
-                if orgNode is None:
-                    input("Error: layout org key not in workflow or status list: " + link.linkAttribs["LayoutLink"]["OrgKey"])
-
-            dstNode = statuses.get(
-                    link.linkAttribs["LayoutLink"]["DstKey"],
-                    workflows.get(link.linkAttribs["LayoutLink"]["DstKey"], None)
-                    )
-            if dstNode == None:
-                act = get_object_from_list(self.statuses, "WorkflowActivityKey", str(link.linkAttribs["LayoutLink"]["DstKey"]).upper())
-                if act is not None:
-                    dstNode = workflows.get(str(get_object_from_list(self.workflows, "WorkflowID", act.WorkflowID).WorkflowKey).lower())
-                if dstNode is None:
-                    input("Error: layout dst key not in workflow or status list: " + link.linkAttribs["LayoutLink"]["DstKey"])
-
-            if orgNode is None or dstNode is None:
-                print("Error orgNode or dstNode is None")
-                quit()
-
-            # Create line segments 
-            # Source point
-            newSegment = []
-            startItem = str(link.linkAttribs["LayoutLink"]["OrgKey"]).upper()
-            endItem = str(link.linkAttribs["LayoutLink"]["DstKey"]).upper()
-
-            x = orgNode.nodeRect.cx
-            y = orgNode.nodeRect.cy
-            nextX = dstNode.nodeRect.cx
-            nextY = dstNode.nodeRect.cy
-            if 'Point' in link.linkAttribs:
-                nextX = float(link.linkAttribs['Point'][0]['X'])
-                nextY = float(link.linkAttribs['Point'][0]['Y'])
-            
-            if orgNode.nodeAttribs["LayoutNode"]["Type"] == "Workflow":
-                y = nextY
-                if nextX < orgNode.nodeRect.cx:
-                    x = orgNode.nodeRect.left
-                else:
-                    x = orgNode.nodeRect.left + orgNode.nodeRect.width
-            else:
-                dx = nextX - x
-                dy = y - nextY
-                lineAngle = math.atan2(dy, dx)
-                a = orgNode.nodeRect.rx
-                b = orgNode.nodeRect.ry
-                top = a * b
-                bottom = (b * math.cos(lineAngle))**2 + (a * math.sin(lineAngle))**2
-                ellipseR = top / math.sqrt(bottom)
-                x = x + math.cos(lineAngle) * ellipseR
-                y = y - math.sin(lineAngle) * ellipseR
-
-            linkPoints.append((x, y, True))
-            newSegment.append((x, y))
-
-            # Mid points
-            if 'Point' in link.linkAttribs:
-                for i in range(len(link.linkAttribs['Point'])):
-                    linkPoints.append((float(link.linkAttribs['Point'][i]['X']), float(link.linkAttribs['Point'][i]['Y']), False))
-                    newSegment.append((x, y))
-
-            # End points
-            x = dstNode.nodeRect.cx
-            y = dstNode.nodeRect.cy
-            if dstNode.nodeAttribs["LayoutNode"]["Type"] == "Workflow":
-                if linkPoints[-1][0] < dstNode.nodeRect.cx:
-                    x = dstNode.nodeRect.left
-                else:
-                    x = dstNode.nodeRect.left + dstNode.nodeRect.width
-                y = linkPoints[-1][1]
-            else:
-                dx = x - linkPoints[-1][0]
-                dy = linkPoints[-1][1] - y
-                lineAngle = math.atan2(dy, dx)
-                a = dstNode.nodeRect.rx
-                b = dstNode.nodeRect.ry
-                top = a * b
-                bottom = (b * math.cos(lineAngle))**2 + (a * math.sin(lineAngle))**2
-                ellipseR = top / math.sqrt(bottom)
-                x = x - math.cos(lineAngle) * ellipseR
-                y = y + math.sin(lineAngle) * ellipseR
-
-            linkPoints.append((x, y, False))
-            newSegment.append((x, y))
-
-            points.append(WFDLineSegments(startItem, endItem, newSegment))
-
-        return WFDScene(
-                statuses,
-                workflows,
-                workflowStatuses,
-                links,
-                linkPoints,
-                points
-            )
-
-
@@ -1,8 +1,8 @@
 import random
 
-from PySide6.QtWidgets import QFrame, QGraphicsView, QVBoxLayout
+from PySide6.QtWidgets import QFrame, QGraphicsView, QMessageBox, QVBoxLayout
 from PySide6.QtGui import QPainter, QPen, QColor, QFontMetrics
-from PySide6.QtCore import QPoint, QRect
+from PySide6.QtCore import QPoint, QRect, QTimer
 
 from .wfd_utilities import drawArrow
 
@@ -12,11 +12,13 @@ _TITLE_OFFS_X = 5
 _TITLE_OFFS_Y = 12
 
 class DrawingWidget(QFrame):
-    def __init__(self, sceneDict: dict, parent=None):
+    def __init__(self, sceneManager, parent=None):
         super().__init__(parent)
 
-        self.sceneDict: dict = sceneDict
-        self.currentWorkflow = list(sceneDict.keys())[0]
+        # Scenes are built by the manager on first request
+        self.sceneManager = sceneManager
+        self.sceneDict: dict = sceneManager.graphicScenes
+        self.currentWorkflow = sceneManager.sceneKeys()[0]
 
         self.setMinimumSize(_DEF_DW_SZ_X, _DEF_DW_SZ_Y)
 
@@ -27,13 +29,30 @@ class DrawingWidget(QFrame):
         self.view = QGraphicsView()
         layout.addWidget(self.view)
 
-        self.view.setScene(self.sceneDict[self.currentWorkflow])
+        scene = self.sceneManager.getGraphicsScene(self.currentWorkflow)
+        if scene is None:
+            # Reported once the window is up rather than before it shows
+            QTimer.singleShot(0, self, lambda key=self.currentWorkflow: self.showSceneError(key))
+        self.view.setScene(scene)
 
 
-    def change_workflow(self, wfTitle):
-        self.currentWorkflow = wfTitle
+    def change_workflow(self, workflowKey):
+        scene = self.sceneManager.getGraphicsScene(workflowKey)
+        if scene is None:
+            # Either it failed to build or the workflow has no placement
+            self.showSceneError(workflowKey)
+            return
+
+        self.currentWorkflow = workflowKey
         #self.update()
-        self.view.setScene(self.sceneDict[self.currentWorkflow])
+        self.view.setScene(scene)
+
+    def showSceneError(self, workflowKey):
+        error = self.sceneManager.sceneError(workflowKey)
+        if error is None:
+            return
+
+        QMessageBox.warning(self, "Workflow Designer", f"Could not display workflow {workflowKey}:\n{error}")
 
     def unused(self):
         painter = QPainter(self)
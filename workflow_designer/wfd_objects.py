@@ -1,16 +1,20 @@
+import logging
 from dataclasses import dataclass
+from typing import Optional
 
 from PySide6.QtCore import Signal, QObject
 from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsEllipseItem, QGraphicsItem, QGraphicsLineItem, QGraphicsRectItem
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPainterPath, QPen, QBrush
 
-NODEPROPS = ['FillColor', 'TextColor', 'Text', 'LabelEdit', 'Alignment', 'DrawColor', 'Shadow']
-NODEATTRIBS = ['Font', 'LayoutNode', 'Shape']
-LINKPROPS = ['DrawColor', 'Shadow', 'DashStyle']
-LINKATTRIBS = ['LayoutLink', 'Point']
+NODEPROPS = frozenset(['FillColor', 'TextColor', 'Text', 'LabelEdit', 'Alignment', 'DrawColor', 'Shadow'])
+NODEATTRIBS = frozenset(['Font', 'LayoutNode', 'Shape'])
+LINKPROPS = frozenset(['DrawColor', 'Shadow', 'DashStyle'])
+LINKATTRIBS = frozenset(['LayoutLink', 'Point'])
 
 class Rect:
+    __slots__ = ('left', 'top', 'width', 'height', 'rx', 'ry', 'cx', 'cy')
+
     def __init__(self, left: float, top: float, width: float, height: float):
         self.left = left
         self.top = top
@@ -31,19 +35,28 @@ class Rect:
 #       'LayoutNode': {'Key': '6539ec3e-1494-4da2-ab3d-7c96ed9fce3f', 
 #           'Type': 'Status', 'CanDelete': 'True', 'WorkflowKey': 'efd1febf-7596-4f63-a731-c9b6df41a72c', 
 #           'IsHidden': 'False', 'IsDefault': 'True', 'Class': 'StatusLayoutNode'}})
-@dataclass
+#
+# key/nodeType (and orgKey/dstKey on links) are lifted out of the LayoutNode/
+# LayoutLink attributes at parse time so the hot paths read a slot rather than
+# going through two dict lookups
+@dataclass(slots=True)
 class Node:
     nodeRect: Rect
     nodeProps: dict
     nodeAttribs: dict[str, dict]
+    key: Optional[str] = None
+    nodeType: Optional[str] = None
     
-@dataclass
+@dataclass(slots=True)
 class Link:
     linkProps: dict
     linkAttribs: dict[str, dict]
+    orgKey: Optional[str] = None
+    dstKey: Optional[str] = None
 
 # Slight issue here where everything is actually being passed as a string oh no!
-@dataclass
+# Frozen so it can key the QFont cache in wfd_scene
+@dataclass(frozen=True)
 class WFDFont:
     Name: str
     Size: float
@@ -66,7 +79,7 @@ class MakeClickableMixin(QObject):
         def clickableMousePressEvent(event):
             if event.button() == Qt.LeftButton:
                 self.clicked.emit()
-                print("Click even emmited")
+                logging.debug("Click event emitted")
 
             originalMouseClickEvent(event)
 
@@ -139,7 +152,7 @@ class WFDClickableEllipse(QGraphicsEllipseItem):
         self.clickableHandler.moved.connect(self.test)
 
     def test(self):
-        print("test")
+        logging.debug("WFDClickableEllipse moved")
 
     def shape(self):
         path = QPainterPath()
@@ -1,12 +1,13 @@
+import logging
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 from typing import Optional, TypedDict
 
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QFontMetrics, QPen
 from PySide6.QtWidgets import QGraphicsItem, QGraphicsTextItem, QGraphicsLineItem, QGraphicsRectItem
 
-from doclink_py.doclink_types.doclink_type_utilities import get_object_from_list
 from doclink_py.doclink_types.workflows import Workflow, WorkflowPlacement
 from workflow_designer.wfd_objects import Link, Node, Rect, WFDFont, WFDLineSegments
 from workflow_designer.wfd_shape import Shape, ShapeEllipse, ShapeRect
@@ -118,7 +119,7 @@ class WFStatus(WFEntity):
         self.textItems.append(titleItem)
 
 class WFScene:
-    def __init__(self, dlPlacement: WorkflowPlacement, sceneWorkflow: Workflow, statusInfo: dict[str, list[str]]):
+    def __init__(self, dlPlacement: WorkflowPlacement, sceneWorkflow: Workflow, statusInfo: dict[str, list[str]], parsedLayout: Optional[tuple[list, list]] = None):
         self.sceneWorkflow: Workflow = sceneWorkflow
         self.dlPlacement: WorkflowPlacement = dlPlacement
         self.statusInfo = statusInfo
@@ -126,7 +127,14 @@ class WFScene:
         self.workflows: list[WFWorkflow] = [] 
         self.statuses: list[WFStatus] = [] 
 
-        nodes, links = createObjectListFromXMLString(self.dlPlacement.LayoutData)
+        # Same entities keyed by entityKey
+        self._workflowByKey: dict[str, WFWorkflow] = {}
+        self._statusByKey: dict[str, WFStatus] = {}
+
+        # The layout may already have been parsed off the GUI thread
+        if parsedLayout is None:
+            parsedLayout = createObjectListFromXMLString(self.dlPlacement.LayoutData)
+        nodes, links = parsedLayout
         self.xmlObjects: XMLObject = { 
                 'nodes': nodes,
                 'links':links 
@@ -136,25 +144,33 @@ class WFScene:
 
     def createEntitiesFromXML(self):
         for node in self.xmlObjects['nodes']:
-            nodeKey = node.nodeAttribs["LayoutNode"]["Key"]
+            # Node keys are already uppercased by wfd_xml
+            nodeKey = node.key
 
-            if node.nodeAttribs["LayoutNode"]["Type"] == 'Status':
-                if get_object_from_list(self.statuses, "entityKey", nodeKey):
-                    input("Error: node key already in statuses dict")
+            if node.nodeType == 'Status':
+                if nodeKey in self._statusByKey:
+                    logging.error("Node key %s already in statuses", nodeKey)
+                    raise KeyError(nodeKey)
 
                 # Needs to be implemented
-                self.statuses.append(convertStatusFromXML(node))
+                status = convertStatusFromXML(node)
+                self.statuses.append(status)
+                self._statusByKey[nodeKey] = status
 
-            elif node.nodeAttribs["LayoutNode"]["Type"] == 'Workflow':
-                if get_object_from_list(self.workflows, "entityKey", nodeKey):
-                    input("Error: node key already in workflows dict")
+            elif node.nodeType == 'Workflow':
+                if nodeKey in self._workflowByKey:
+                    logging.error("Node key %s already in workflows", nodeKey)
+                    raise KeyError(nodeKey)
 
-                self.workflows.append(convertWorkflowFromXML(node, self.statusInfo[nodeKey.upper()]))
+                workflow = convertWorkflowFromXML(node, self.statusInfo[nodeKey])
+                self.workflows.append(workflow)
+                self._workflowByKey[nodeKey] = workflow
 
                 # We need to add statuses
 
             else:
-                input("Warning: unknown node type:" + node.nodeAttribs["LayoutNode"]["Type"])
+                logging.error("Unknown node type: %s", node.nodeType)
+                raise ValueError(f"Unknown node type: {node.nodeType}")
 
 @dataclass
 class WFDScene:
@@ -171,7 +187,7 @@ def convertStatusFromXML(node: Node) -> WFStatus:
     if 'Font' in node.nodeAttribs:
         font = WFDFont(**node.nodeAttribs['Font'])
     return WFStatus(
-            node.nodeAttribs["LayoutNode"]["Key"],
+            node.key,
             node.nodeProps["Text"],
             node.nodeRect,
             font
@@ -183,13 +199,15 @@ def convertWorkflowFromXML(node: Node, statuses: list[str]) -> WFWorkflow:
     if 'Font' in node.nodeAttribs:
         font = WFDFont(**node.nodeAttribs['Font'])
     return WFWorkflow(
-            node.nodeAttribs["LayoutNode"]["Key"],
+            node.key,
             node.nodeAttribs["LayoutNode"]["Tooltip"],
             statuses,
             node.nodeRect,
             font
         )
 
+# QFont is copied on setFont, so one instance can be shared per distinct font
+@lru_cache(maxsize=128)
 def createFontFromWFDFont(wfdFont):
     font = QFont(wfdFont.Name, int(round(float(wfdFont.Size))))
     font.setBold(wfdFont.Bold=='True')
@@ -21,11 +21,12 @@ class WorkflowDesignerWindow(QDialog):
         self.setGeometry(150, 150, _DEF_WDW_SZ_X, _DEF_WDW_SZ_Y)
 
         scene_manager = WorkflowSceneManager(doclink)
-        sceneDict = scene_manager.graphicScenes #scene_manager.build_scenes()
+        self.finished.connect(scene_manager.shutdown)
+        self.workflows: list[Workflow] = scene_manager.workflows
 
         main_splitter = QSplitter(Qt.Horizontal)
 
-        self.drawing_area = DrawingWidget(sceneDict)
+        self.drawing_area = DrawingWidget(scene_manager)
         main_splitter.addWidget(self.drawing_area)
 
         right_pane = QSplitter(Qt.Vertical)
@@ -47,6 +48,10 @@ class WorkflowDesignerWindow(QDialog):
         layout.addWidget(main_splitter)
         self.setLayout(layout)
 
+        # The first workflow is built above; the rest fill in once the window
+        # is up and the event loop is idle
+        scene_manager.prebuildScenes()
+
     def workflow_list(self, workflows) -> QListView:
         workflow_str = [workflow.Title for workflow in workflows]
         workflow_model = QStringListModel(workflow_str) 
@@ -58,4 +63,6 @@ class WorkflowDesignerWindow(QDialog):
         return workflow_list
 
     def change_workflow(self, index):
-        self.drawing_area.change_workflow(index.data())
+        # Scenes are keyed by WorkflowKey, not the title shown in the list
+        workflow = self.workflows[index.row()]
+        self.drawing_area.change_workflow(str(workflow.WorkflowKey))
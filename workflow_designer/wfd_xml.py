@@ -1,15 +1,63 @@
+import logging
+import sys
 import xml.etree.ElementTree as ET
+from operator import itemgetter
 
 from workflow_designer.wfd_objects import Node, Link, Rect, NODEPROPS, NODEATTRIBS, LINKPROPS, LINKATTRIBS, WFDClickableRect, WFDClickableLine, WFDClickableEllipse, WFDLineSegments
 
+_FEED_CHUNK_SZ = 64 * 1024
+
+# Subchild tag -> where its data is stored, so each subchild costs one lookup
+_PROP = 0
+_ATTRIB = 1
+_POINT = 2
+_NODE_TAG_BUCKET = {tag: _PROP for tag in NODEPROPS} | {tag: _ATTRIB for tag in NODEATTRIBS}
+_LINK_TAG_BUCKET = {tag: _PROP for tag in LINKPROPS} | {tag: _ATTRIB for tag in LINKATTRIBS} | {"Point": _POINT}
+
+_getRectAttribs = itemgetter("Left", "Top", "Width", "Height")
+
+def _canonicalKey(key):
+    # Keys are GUIDs whose case varies between the layout XML and the
+    # database; they are uppercased and interned once here so consumers can
+    # compare and hash them without normalising
+    if key is None:
+        return None
+    return sys.intern(key.upper())
+
 def createObjectListFromXMLFile(filename: str) -> tuple[list, list]:
-    tree = ET.parse(filename)
-    root = tree.getroot()
-    return createObjectListFromXML(root)
+    return createObjectListFromXMLEvents(ET.iterparse(filename, events=("start", "end")))
 
 def createObjectListFromXMLString(xmlString: str) -> tuple[list, list]:
-    root = ET.fromstring(xmlString)
-    return createObjectListFromXML(root)
+    return createObjectListFromXMLEvents(_iterXMLStringEvents(xmlString))
+
+def _iterXMLStringEvents(xmlString: str):
+    # Fed in chunks so elements can be cleared before the rest is parsed
+    parser = ET.XMLPullParser(events=("start", "end"))
+    for i in range(0, len(xmlString), _FEED_CHUNK_SZ):
+        parser.feed(xmlString[i:i + _FEED_CHUNK_SZ])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+def createObjectListFromXMLEvents(events) -> tuple[list, list]:
+    """Creates node and link objects from (start/end) parse events, dropping
+    each top level element once it has been converted"""
+
+    nodeList: list[Node] = []
+    linkList: list[Link] = []
+
+    depth = 0
+    for event, elem in events:
+        if event == "start":
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1:
+            addObjectFromXML(elem, nodeList, linkList)
+            elem.clear()
+
+    return nodeList, linkList
 
 def createObjectListFromXML(root) -> tuple[list, list]:
     """Creates node and link objects from XML data"""
@@ -18,50 +66,68 @@ def createObjectListFromXML(root) -> tuple[list, list]:
     linkList: list[Link] = []
 
     for child in root:
-        if child.tag == 'Node':
-            nodeRect = Rect(
-                    float(child.attrib["Left"]),
-                    float(child.attrib["Top"]),
-                    float(child.attrib["Width"]),
-                    float(child.attrib["Height"])
-                    )
-
-            nodeProps = {}
-            nodeAttribs = {}
-            for subchild in child:
-                if subchild.tag in NODEPROPS:
-                    nodeProps[subchild.tag] = subchild.text
-                elif subchild.tag in NODEATTRIBS:
-                    nodeAttribs[subchild.tag] = subchild.attrib
-                else:
-                    input("Unknown subchild.tag during node search: " + subchild.tag)
-
-                #print(attrib.tag, attrib.attrib)
-
-            nodeList.append(Node(nodeRect, nodeProps, nodeAttribs))
-        elif child.tag == 'Link':
-            linkProps = {} 
-            linkAttribs = {} 
-
-            for subchild in child:
-                if subchild.tag in LINKPROPS:
-                    linkProps[subchild.tag] = subchild.text
-                elif subchild.tag in LINKATTRIBS:
-                    if subchild.tag == "Point":
-                        if subchild.tag not in linkAttribs:
-                            linkAttribs[subchild.tag] = []    
-                        linkAttribs[subchild.tag].append(subchild.attrib)
-                    else:
-                        linkAttribs[subchild.tag] = subchild.attrib
-                else:
-                    input("Unknown subchild.tag during link search: " + subchild.tag)
-
-            linkList.append(Link(linkProps, linkAttribs))
-        elif child.tag == "Version":
-            continue
-        else:
-            input("Unkown child tag:" + child.tag)
+        addObjectFromXML(child, nodeList, linkList)
 
     return nodeList, linkList
 
+def addObjectFromXML(child, nodeList: list[Node], linkList: list[Link]) -> None:
+    tag = child.tag
+
+    if tag == 'Node':
+        left, top, width, height = map(float, _getRectAttribs(child.attrib))
+        nodeRect = Rect(left, top, width, height)
+
+        nodeProps = {}
+        nodeAttribs = {}
+        getBucket = _NODE_TAG_BUCKET.get
+        for subchild in child:
+            subTag = subchild.tag
+            bucket = getBucket(subTag)
+            if bucket == _PROP:
+                nodeProps[subTag] = subchild.text
+            elif bucket == _ATTRIB:
+                nodeAttribs[subTag] = subchild.attrib
+            else:
+                logging.warning("Unknown subchild tag during node search: %s", subTag)
+
+        layoutNode = nodeAttribs.get("LayoutNode", {})
+        nodeList.append(Node(
+                nodeRect,
+                nodeProps,
+                nodeAttribs,
+                _canonicalKey(layoutNode.get("Key")),
+                layoutNode.get("Type")
+            ))
+    elif tag == 'Link':
+        linkProps = {}
+        linkAttribs = {}
+        points = []
+
+        getBucket = _LINK_TAG_BUCKET.get
+        for subchild in child:
+            subTag = subchild.tag
+            bucket = getBucket(subTag)
+            if bucket == _PROP:
+                linkProps[subTag] = subchild.text
+            elif bucket == _POINT:
+                points.append(subchild.attrib)
+            elif bucket == _ATTRIB:
+                linkAttribs[subTag] = subchild.attrib
+            else:
+                logging.warning("Unknown subchild tag during link search: %s", subTag)
+
+        if points:
+            linkAttribs["Point"] = points
+
+        layoutLink = linkAttribs.get("LayoutLink", {})
+        linkList.append(Link(
+                linkProps,
+                linkAttribs,
+                _canonicalKey(layoutLink.get("OrgKey")),
+                _canonicalKey(layoutLink.get("DstKey"))
+            ))
+    elif tag == "Version":
+        return
+    else:
+        logging.warning("Unknown child tag: %s", tag)
 